@@ -1,20 +1,22 @@
-import shutil
+import argparse
+
+from core.workspace import MAX_BYTES, Workspace
+
 
 def main():
-  answer = ''
-  while answer.lower() not in ('y', 'yes', 'n', 'no'):
-    answer = input("All files in /tmp will be deleted, continue? (y)es or (n)o?\n")
+  parser = argparse.ArgumentParser(description='Remove stale or excess converted files from tmp/.')
+  parser.add_argument('--max-mb', type=float, default=MAX_BYTES / 1024**2,
+                      help='Size cap of tmp/ in MB, the least recently used files are removed first.')
+  parser.add_argument('--all', action='store_true', help='Remove all files in tmp/.')
+  args = parser.parse_args()
 
-  if answer[0].lower() == 'n':
-    exit()
+  workspace = Workspace()
+  if args.all:
+    workspace.clear()
+    print('Removed all files in tmp/.')
   else:
-    cleanup()
-
-def cleanup():
-  try:
-    shutil.rmtree('tmp')
-  except FileNotFoundError:
-    pass
+    removed = workspace.prune(int(args.max_mb * 1024**2))
+    print('Removed {} files from tmp/.'.format(len(removed)))
   print('Finished.')
 
 if __name__ == '__main__':
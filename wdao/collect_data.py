@@ -1,10 +1,39 @@
 #!/usr/bin/python3
+import argparse
+
 import core.data as data
 
+
+def positive_int(value):
+  value = int(value)
+  if value < 1:
+    raise argparse.ArgumentTypeError("{} is not a positive number.".format(value))
+  return value
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(description='Collect all harvests from the forms.')
+  parser.add_argument('--years', nargs='+', type=int, help='Only process forms of these years, e.g. 2012 2013.')
+  parser.add_argument('--codes', nargs='+', help='Only process forms with these plant codes.')
+  parser.add_argument('--plants', nargs='+', help='Only process forms of these plants, and forms with codes not in output/data.csv.')
+  parser.add_argument('--parts', nargs='+', help='Only process forms of these plant parts, and forms with codes not in output/data.csv.')
+  parser.add_argument('--converters', type=positive_int, default=2, help='Number of forms converted at the same time.')
+  return parser.parse_args()
+
+
 def main():
+  args = parse_args()
+  filters = dict(years=args.years, codes=args.codes, plants=args.plants, parts=args.parts)
   d = data.Data()
-  d.list_all_harvests()
-  d.save_data_to_csv()
+  d.list_all_harvests(converters=args.converters, **filters)
+  if any(v is not None for v in filters.values()):
+    # Replace only the selected harvests in the existing list,
+    # then reorder all harvests, which does not require any form to be opened.
+    d.merge_harvests(**filters)
+  else:
+    d.save_data_to_csv()
+  if not d.data:
+    return print("No harvests to order.")
   d.order_harvests_by_year_and_plant(output='output/geordende_oogsten_jaar.csv', include_year=True)
 
 if __name__ == '__main__':
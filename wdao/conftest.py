@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Make the core package importable for the tests in tests/,
+# the same way the scripts in this directory import it.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
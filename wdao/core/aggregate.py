@@ -0,0 +1,70 @@
+import numpy as np
+
+STATISTICS = ('median', 'mean', 'trimmed_mean', 'weighted_mean', 'weighted_median')
+
+
+def group_by(keys, values, statistics=('median',), weights=None, trim=0.1):
+  """ Calculate statistics of values per group in one pass.
+  Return {key: {statistic: value}}.
+
+  Arguments:
+    keys (list): Group of each value, e.g. (plant, part, year) tuples.
+    values (list): Numeric values.
+    statistics (tuple): Statistics to calculate, see STATISTICS.
+    weights (list): Weight of each value, used by the weighted statistics. Defaults to 1.
+      The weighted median is the mean of the two middle values when the cumulative
+      weight is exactly half, so with equal weights it equals the median.
+    trim (float): Fraction cut off at both ends for the trimmed mean, 0 <= trim < 0.5.
+  """
+  for s in statistics:
+    if s not in STATISTICS:
+      raise ValueError("Unknown statistic {}.".format(s))
+  if not 0 <= trim < 0.5:
+    raise ValueError("Trim must be between 0 and 0.5.")
+
+  # Number the groups in order of appearance
+  groups = {}
+  codes = np.array([groups.setdefault(k, len(groups)) for k in keys], dtype=int)
+  values = np.asarray(values, dtype=float)
+  weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+  if not len(values):
+    return {}
+
+  # Sort by group, then by value, so each group is a sorted slice.
+  order = np.lexsort((values, codes))
+  v = values[order]
+  w = weights[order]
+  counts = np.bincount(codes)
+  ends = np.cumsum(counts)
+  starts = ends - counts
+
+  results = {}
+  with np.errstate(divide='ignore', invalid='ignore'):
+    if 'median' in statistics:
+      results['median'] = (v[starts + (counts-1)//2] + v[starts + counts//2]) / 2
+    if 'mean' in statistics:
+      results['mean'] = np.bincount(codes, weights=values) / counts
+    if 'trimmed_mean' in statistics:
+      k = np.floor(counts * trim).astype(int)
+      cumulative = np.concatenate(([0], np.cumsum(v)))
+      results['trimmed_mean'] = (cumulative[ends-k] - cumulative[starts+k]) / (counts - 2*k)
+    if 'weighted_mean' in statistics:
+      results['weighted_mean'] = np.bincount(codes, weights=weights*values) / np.bincount(codes, weights=weights)
+    if 'weighted_median' in statistics:
+      # First value per group where the cumulative weight reaches half of the group total,
+      # and the first value where it passes half. They differ only if half is reached exactly.
+      cumulative = np.cumsum(w)
+      half = cumulative[ends-1] - (cumulative[ends-1] - cumulative[starts] + w[starts]) / 2
+      lower = np.clip(np.searchsorted(cumulative, half, side='left'), starts, ends-1)
+      upper = np.clip(np.searchsorted(cumulative, half, side='right'), starts, ends-1)
+      results['weighted_median'] = (v[lower] + v[upper]) / 2
+
+  return {k: {s: float(results[s][i]) for s in statistics} for k, i in groups.items()}
+
+
+def aggregate(values, statistic='median', weights=None, trim=0.1):
+  """ Calculate a single statistic of values, see group_by. """
+  result = group_by([None] * len(values), values, (statistic,), weights, trim)
+  if not result:
+    raise ValueError("No values to aggregate.")
+  return result[None][statistic]
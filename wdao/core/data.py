@@ -1,16 +1,16 @@
-import csv
 import os
 import glob
-import re
 import scipy.stats
 import subprocess
 
-from collections import OrderedDict
 from operator import itemgetter
 from tqdm import tqdm
 from pathlib import Path
 
+from . import aggregate
 from . import forms
+from . import pipeline
+from . import selection
 from . import helpers
 
 
@@ -18,108 +18,151 @@ class Data:
   data = []
   """Data object that contains data"""
 
-  def list_all_harvests(self, path=None):
+  def list_all_harvests(self, path=None, years=None, codes=None, plants=None, parts=None, converters=2,
+                        known='output/data.csv'):
     """Collect data from leveringsformulieren and list all harvests.
-    Save to file. One row per harvest (code, full name, *[harvests])"""
+    Save to file. One row per harvest (code, full name, part, date, filename of the form)
+    Arguments:
+      years (list): Only process forms of these years, e.g. [2012, 2013].
+      codes (list): Only process forms with these plant codes.
+      plants (list): Only keep harvests of plants whose name starts with one of these.
+      parts (list): Only keep harvests of these plant parts.
+      converters (int): Number of forms converted at the same time.
+      known (string): Harvests collected earlier, used to find the codes of the selected plants/parts.
+    Years and codes are read from the filename and filtered before any form is opened.
+    Plant name and part are only known after the form is parsed, so they are translated to
+    codes using the harvests collected earlier. Forms with unknown codes are always parsed.
+    """
     print("Collecting data from forms.")
     if path is None:
       # Go up two dirs and add trailing slash
       path = os.path.join(str(Path(__file__).parents[2]), '')
 
     # RegEx for the filename
-    pattern = re.compile(r"""(\d\d)      # year
-                             ([A-Za-z]+) # the plant code
-                             (\d\d)      # the month
-                             (\d\d)      # the day
-                         """, re.IGNORECASE | re.VERBOSE)
+    pattern = selection.FILENAME
 
     files = [g for g in glob.glob(path + '20??/*') if pattern.search(g)]
     # Reduce files to relevant files.
     files = [f for f in files if not 'teelt' in f]
+    # Reduce files to the selected years and codes.
+    files = [f for f in files if selection.form_selected(f, years=years, codes=codes)]
+    if plants is not None or parts is not None:
+      known_codes, selected_codes = selection.known_codes(known, plants=plants, parts=parts)
+      files = [f for f in files if pattern.search(f).group(2).strip().lower() in selected_codes
+               or pattern.search(f).group(2).strip().lower() not in known_codes]
     total = len(files)
 
-    # Start processing files
-    count = 0
-    data = []
-    for f in tqdm(files):
+    def parse(f, converted):
       # Get year, name and month from filename
       # <yy><name><mm><dd>
       y, name, m, d = pattern.search(f).groups()
       name = name.strip().lower()
-      date = (int(y), int(m), int(d))
 
-      # Initialize form
-      form = forms.Form(f)
-      # Append data if valid
+      # Initialize form, it has already been converted.
+      form = forms.Form(f, converted=converted)
+      # Return data if valid
       try:
-        data.append([name, form.get_plant_name().replace(',', ''),\
-                     form.get_plant_part().lower(), form.get_date()])
+        return [name, form.get_plant_name().replace(',', ''),\
+                form.get_plant_part().lower(), form.get_date(), form.full_name]
       except AttributeError:
+        return None
+
+    # Start processing files
+    # Forms are parsed while the next ones are being converted.
+    rows = {}
+    results = pipeline.convert_and_parse(files, forms.prepare, parse, converters=converters,
+                                         profiles=forms.workspace.profiles)
+    for f, row, error in tqdm(results, total=total):
+      if error is not None:
+        print('Could not process {}: {}'.format(f, error))
+      elif row is None:
         print('Could not process {}.'.format(f))
       else:
-        count += 1
+        rows[f] = row
+    count = len(rows)
+    # Record the conversions and evict stale or excess ones.
+    forms.workspace.prune()
+    data = [rows[f] for f in files if f in rows and selection.harvest_selected(rows[f], plants=plants, parts=parts)]
 
-    print("Finished. Succesfully processed {} of {} files. {:.2f}%".format(count, total, count/total*100))
+    if not total:
+      print("No forms found.")
+    else:
+      print("Finished. Succesfully processed {} of {} files. {:.2f}%".format(count, total, count/total*100))
     type(self).data = data
     return self.data
 
-  def order_harvests_by_year_and_plant(self, output='output/geordende_oogsten.csv', include_year=False):
+  def order_harvests_by_year_and_plant(self, output='output/geordende_oogsten.csv', include_year=False,
+                                       plants=None, parts=None, statistic='median'):
     """ Take all harvests as self.data
-    Return harvests ordered by plant/part and save to file."""
+    Return harvests ordered by plant/part and save to file.
+    If plants or parts are given, only those rows are replaced in the existing output.
+    Arguments:
+      statistic (string): How the harvests of a plant/part in one year are combined:
+        'median', 'mean' or 'trimmed_mean'.
+    """
+    if statistic not in ('median', 'mean', 'trimmed_mean'):
+      raise ValueError("Unknown statistic {}.".format(statistic))
 
     # Collect data
     if not self.data:
       self.list_all_harvests()
 
     # Read data
-    ordered_data = {}
-    harvests_by_year = {}
+    keys = []
+    values = []
     for line in self.data:
-      code, name, part, date = line
+      if not selection.harvest_selected(line, plants=plants, parts=parts):
+        continue
+      code, name, part, date = line[:4]
       code = code.strip().lower()
       part = part.strip().lower()
       # Convert date dd-mm-yyyy to list of year, month, day integers
       date = [int(x) for x in date.strip().split('-')]
       date.reverse()
       year, month, day = date
-      # Create separate lists of harvests per plant+part
-      # Dates are written as decimal_date#year in the data.
       try:
-        harvests_by_year.setdefault(year, {}).\
-          setdefault(name + '#' + part, []).append(helpers.numerize_date(date, include_year))
+        value = helpers.numerize_date(date)
       except TypeError:
-        pass
+        continue
+      # Skip invalid dates
+      if not value:
+        continue
+      keys.append((name + '#' + part, year))
+      values.append(value)
 
-    # Sort by year
-    harvests_by_year = OrderedDict(sorted(harvests_by_year.items()))
+    # Combine the harvests per plant+part per year
+    harvests = aggregate.group_by(keys, values, statistics=(statistic,))
 
-    # Get median per harvest per year
+    # Sort by year
+    # Dates are written as decimal_date#year in the data.
     all_harvests = {}
-    for year, harvests in harvests_by_year.items():
-      for name, harvest in harvests.items():
-        all_harvests.setdefault(name, []).append(
-          harvest[len(harvest)//2]
-        )
+    for (name, year), result in sorted(harvests.items(), key=lambda item: item[0][1]):
+      value = result[statistic]
+      all_harvests.setdefault(name, []).append(
+        '{:.2f}#{}'.format(value, year) if include_year else round(value, 2)
+      )
 
     # Write data
     # Split the key as k by # and unpack
     # unpack harvests as v
     data = [[*k.split('#'), *v] for k,v in all_harvests.items()]
     self.data = data
-    self.save_data_to_csv(output)
+    self.save_data_to_csv(output, keep=selection.outside(plants=plants, parts=parts))
     print("Harvests ordered by plant/part saved to {}".format(output))
     return self.data
 
-  def range_and_average(self):
+  def range_and_average(self, plants=None, parts=None):
     """ Take all harvests as self.data
     Return harvests date range and average by plant/part
-    and save to file."""
+    and save to file.
+    If plants or parts are given, only those rows are replaced in the existing output."""
     if not self.data:
       self.order_harvests_by_year_and_plant()
     # Range and average per plant/part
     # Filter empty values and newlines
     filtered = ('', '\n')
-    self.data = [[val for val in line if val not in filtered] for line in self.data]
+    self.data = [[val for val in line if val not in filtered] for line in self.data
+                 if selection.ordered_selected(line, plants=plants, parts=parts)]
 
     data = []
     for line in self.data:
@@ -131,7 +174,7 @@ class Data:
       data.append([full_name, part, date._range_as_str(), date._mean_as_str(), len(dates)])
     self.data = data
     output = 'output/geordende_oogsten_bereik_gem.csv'
-    self.save_data_to_csv(output)
+    self.save_data_to_csv(output, keep=selection.outside(plants=plants, parts=parts))
     print("Range and mean for harvests by plant/part saved to {}".format(output))
 
   def collect_from_csv(self, path='data.csv'):
@@ -148,14 +191,23 @@ class Data:
     type(self).data = data
     return self.data
 
-  def trend(self):
-    if not self.data:
-      self.order_harvests_by_year_and_plant()
+  def trend(self, rows=None, plants=None, parts=None):
+    """ Correlation and slope of the harvest dates over the years per plant/part.
+    Arguments:
+      rows (iterable): Ordered rows to use instead of self.data, e.g. from reader.RowIndex.
+      plants (list), parts (list): The selection the rows were read for.
+        Only those rows are replaced in the existing output.
+    """
+    if rows is None:
+      if not self.data:
+        self.order_harvests_by_year_and_plant()
+      rows = self.data
 
     data = []
-    for row in self.data:
+    for row in rows:
       name, part = row[:2]
-      dates = [float(x) for x in row[2:] if x != '' and x!= '\n']
+      # Dates may be written as decimal_date#year
+      dates = [float(x.split('#')[0]) for x in row[2:] if x.strip() != '']
       # Calculate correlation for the dates of the harvests, and the index of date c.q. the position in sequence
       # assuming the dates are ordered by year, which they are.
       x = [dates.index(d)+1 for d in dates]
@@ -172,20 +224,29 @@ class Data:
     data = sorted(data, key=itemgetter(2))
     self.data = data
     output = 'output/tendens.csv'
-    self.save_data_to_csv(output)
+    self.save_data_to_csv(output, keep=selection.outside(plants=plants, parts=parts))
+    print("Trends by plant/part saved to {}".format(output))
 
-  def save_data_to_csv(self, output='output/data.csv'):
-    """Save data, if any, to csv"""
+  def save_data_to_csv(self, output='output/data.csv', keep=None):
+    """Save data, if any, to csv
+    Arguments:
+      keep (callable): Merge with the existing output, keeping the rows for which keep(row) is True.
+        By default the output is overwritten.
+    """
     if not self.data:
       return print("Nothing to save.")
 
     if not os.path.exists('output'):
       os.mkdir('output')
 
-    with open(output, 'w') as f:
-      wr = csv.writer(f)
-      wr.writerows(self.data)
-    return output
+    return selection.write_csv(output, self.data, keep=keep)
+
+  def merge_harvests(self, output='output/data.csv', years=None, codes=None, plants=None, parts=None):
+    """ Replace the selected harvests in output by self.data and save.
+    Harvests outside the selection are kept. Return all harvests. """
+    self.data = selection.merge_harvests(output, self.data, years=years, codes=codes,
+                                         plants=plants, parts=parts)
+    return self.data
 
   def get_data(self):
     """ Collect the data. """
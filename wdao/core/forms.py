@@ -5,11 +5,14 @@ import re
 import subprocess
 
 
+from datetime import date
 from docx import Document
 from pathlib import Path
 from shutil import copyfile
 
-from . helpers import DateRange
+from . aggregate import aggregate
+from . helpers import DateRange, matches, matches_part
+from . workspace import Workspace
 
 # For personal use in linux/ubuntu
 # LibreOffice is required.
@@ -19,22 +22,59 @@ except FileNotFoundError:
   print("LibreOffice is required, but not installed.")
   exit()
 
+# Converted forms in tmp/
+workspace = Workspace()
+
+def wait_for_soffice():
+  """ LibreOffice can be run only once with the default profile.
+  Make sure it is closed. """
+  result = str(subprocess.check_output(('ps', '-A')))
+  while 'soffice' in result:
+    print('\n' * 80)
+    print("Please close LibreOffice first to ensure this program works correctly.")
+    input('Press enter to continue.')
+    result = str(subprocess.check_output(('ps', '-A')))
+
+
+def prepare(path, profile=None):
+  """ Return the path of a docx version of a form, converting it if there is no
+  up to date copy. Return None if conversion failed. """
+  if os.path.splitext(path)[1].lower() != '.doc':
+    return path
+  return workspace.lookup(path) or convert_to_docx(path, profile)
+
+
+def convert_to_docx(path, profile=None):
+  """ Save a copy of a form as docx in tmp/<parentdir>/. Return new path, or None if conversion failed.
+  Arguments:
+    profile (string): LibreOffice profile directory. soffice instances with their
+      own profile can run at the same time. By default the user profile is used.
+  """
+  # Remove an out of date copy, so a failed conversion does not leave it in place.
+  workspace.evict(path)
+  new_path = workspace.path_for(path)
+  args = ['soffice', '--headless', '--convert-to', 'docx',
+          '--outdir', os.path.split(new_path)[0], path]
+  if profile is None:
+    wait_for_soffice()
+  else:
+    args.insert(1, '-env:UserInstallation=' + Path(profile).resolve().as_uri())
+  result = subprocess.call(args, stdout=subprocess.PIPE)
+  if result != 0 or not os.path.isfile(new_path):
+    return None
+  workspace.add(path, new_path)
+  return new_path
+
+
 class Form:
-  def __init__(self, path):
+  def __init__(self, path, profile=None, converted=None):
     """
     Arguments:
       path (string) : Absolute, or relative to cwd, path to file.
+      profile (string) : LibreOffice profile directory used for conversion, see convert_to_docx.
+      converted (string) : Path to a docx copy of a .doc file that has already been converted.
     """
 
-    # LibreOffice is needed for conversion but can be run only once.
-    # Make sure it is closed.
-    result = str(subprocess.check_output(('ps', '-A')))
-    while 'soffice' in result:
-      print('\n' * 80)
-      print("Please close LibreOffice first to ensure this program works correctly.")
-      input('Press enter to continue.')
-      result = str(subprocess.check_output(('ps', '-A')))
-
     # Attributes
     self.path = path
     self.directory, self.full_name = os.path.split(self.path)
@@ -50,15 +90,12 @@ class Form:
 
     # Convert doc to docx, if it has not already been done.
     if self.extension.lower() == '.doc':
-      new_path = os.path.join('tmp', self.parentdir, self.short_name + '.docx')
-      # Does converted file already exist?
-      try:
-        open(new_path)
-      # Convert file if .docx version does not yet exist.
-      except FileNotFoundError:
-        self.convert_to_docx()
-      finally:
-        self.path = new_path
+      # Convert file if .docx version does not yet exist or is out of date.
+      if converted is None:
+        converted = prepare(self.path, profile)
+      if converted is None:
+        raise RuntimeError("Could not convert {} to docx.".format(self.path))
+      self.path = converted
       self.doc = Document(self.path)
 
   def convert_to_txt(self):
@@ -105,12 +142,26 @@ class Form:
           dates = rough_date.strip(', ').split(',')
           dates = [self._read_date(d) for d in dates]
           # Get median
-          self.date = dates[len(dates)//2]
+          self.date = self._median_date(dates)
         # Only one date
         else:
           self.date = self._read_date(rough_date)
     return self.date
 
+  def _median_date(self, dates):
+    """ Return the median of dd-mm-yyyy strings as dd-mm-yyyy string.
+    Invalid dates are ignored, if there are no valid dates the first one is returned. """
+    days = []
+    for d in dates:
+      day, month, year = [int(x) for x in d.split('-')]
+      try:
+        days.append(date(year, month, day).toordinal())
+      except ValueError:
+        pass
+    if not days:
+      return dates[0]
+    return date.fromordinal(int(aggregate(days, 'median'))).strftime('%d-%m-%Y')
+
   def _read_date(self, date):
     """ Format string as dd-mm-yyyy string. """
     # Is month notated as letters? eg. dd-month-yyyy
@@ -163,18 +214,16 @@ class Form:
         y += 1
       x += 1
 
-  def convert_to_docx(self):
-    """ Save a copy of form as docx. Return new path. """
-    args = ['soffice', '--headless', '--convert-to', 'docx',
-            '--outdir', 'tmp/' + self.parentdir, self.path]
-    subprocess.call(args, stdout=subprocess.PIPE)
-    return 'tmp/' + self.path + 'x'
+  def convert_to_docx(self, profile=None):
+    """ Save a copy of form as docx. Return new path, or None if conversion failed. """
+    return convert_to_docx(self.path, profile)
 
 
 class Spec(Form):
   """ SPC form. """
   not_found = []
   not_enough_data = []
+  skipped = []
 
   def __init__(self, path):
     # Call parent init
@@ -197,10 +246,12 @@ class Spec(Form):
     with open(filename, 'a') as f:
       f.write('{},{}\n'.format(self.plant_name, self.refname))
 
-  def update(self, data=None, min_n=None):
+  def update(self, data=None, min_n=None, plants=None, parts=None):
     """Update spec based on data.
     Arguments:
       min_n (int): Minimum number of data entries required to update date/range. TODO
+      plants (list): Only update specs of plants whose name starts with one of these.
+      parts (list): Only update specs of these plant parts.
     """
     # Collect data
     if data is not None:
@@ -211,11 +262,19 @@ class Spec(Form):
     else:
       self.data = Data().get_data()
 
+    # Only search the data of the selected plants/parts
+    self.data = [row for row in self.data
+                 if matches(row[0], plants, prefix=True) and matches_part(row[1], parts)]
+
     # Open file
     self.doc = Document(self.path)
-    return self._edit_cells(min_n)
+    return self._edit_cells(min_n, plants, parts)
 
-  def _edit_cells(self, min_n):
+  def in_selection(self, plants=None, parts=None):
+    """ Return True if the plant name and part of the spec pass the filters. """
+    return matches(self.plant_name, plants, prefix=True) and matches_part(self.plant_part, parts)
+
+  def _edit_cells(self, min_n, plants=None, parts=None):
     """ Edit the cells in the SPC form file. """
     # Get scientific name
     self.plant_name = self.get_plant_name()
@@ -232,6 +291,11 @@ class Spec(Form):
       self.not_found.append(self.full_name)
       return
 
+    # Spec is not part of the selection
+    if not self.in_selection(plants, parts):
+      self.skipped.append(self.full_name)
+      return
+
     # Get coordinates of cell containing period
     x, y, z = self._index_of_cell('oogstperiode')
     c = self.doc.tables[x].rows[y].cells[z+1]
@@ -121,3 +121,34 @@ def create_incremented_filename(path):
       else:
         i += 1
 
+
+def full_year(year):
+  """ Return year as a four digit integer, e.g. 12 -> 2012. """
+  year = int(year)
+  return year if year >= 100 else 2000 + year
+
+
+def matches(value, allowed, prefix=False):
+  """ Return True if value passes the filter, compared case insensitive.
+
+  Arguments:
+    value: The value to check.
+    allowed (iterable): Accepted values. None accepts everything.
+    prefix (bool): Also accept values starting with one of the accepted values.
+  """
+  if allowed is None:
+    return True
+  value = str(value).strip().lower()
+  allowed = [str(a).strip().lower() for a in allowed]
+  if prefix:
+    return any(value.startswith(a) for a in allowed)
+  return value in allowed
+
+
+def matches_part(part, parts):
+  """ Return True if a plant part passes the filter parts.
+  Parts are compared on their first 4 characters, e.g. 'bloem' matches 'bloemen'.
+  """
+  if parts is None:
+    return True
+  return any(p.strip().lower()[:4] in str(part).lower() for p in parts)
@@ -0,0 +1,92 @@
+import os
+import queue
+import threading
+
+PROFILES = os.path.join('tmp', '.profiles') # One LibreOffice profile per converter
+
+# Marks the end of a queue
+_DONE = object()
+
+
+def convert_and_parse(paths, convert, parse, converters=2, parsers=1, maxsize=8, profiles=PROFILES):
+  """ Convert forms to docx and parse them as soon as they are converted.
+  Conversion and parsing overlap: converters run soffice while parsers read the
+  forms that are ready. Yield (path, result, error) in order of completion, error is
+  None if the form was converted and parsed, otherwise the exception or reason.
+
+  Arguments:
+    paths (list): Paths to the forms.
+    convert (callable): Called with the path and a profile directory. Returns the path
+      of the converted copy, or None if conversion failed.
+    parse (callable): Called with the original path and the path of the converted copy.
+    converters (int): Number of soffice instances running at the same time.
+    parsers (int): Number of parser threads.
+    maxsize (int): Maximum number of forms waiting to be converted and to be parsed.
+    profiles (string): Directory for the LibreOffice profiles of the converters.
+  """
+  if converters < 1:
+    raise ValueError("At least one converter is required.")
+  if parsers < 1:
+    raise ValueError("At least one parser is required.")
+  return _run(paths, convert, parse, converters, parsers, maxsize, profiles)
+
+
+def _run(paths, convert, parse, converters, parsers, maxsize, profiles):
+  todo = queue.Queue(maxsize)
+  ready = queue.Queue(maxsize)
+  results = queue.Queue()
+
+  def feed():
+    for path in paths:
+      todo.put(path)
+    for _ in range(converters):
+      todo.put(_DONE)
+
+  def convert_forms(profile):
+    while True:
+      path = todo.get()
+      if path is _DONE:
+        break
+      try:
+        converted = convert(path, profile)
+      except Exception as e:
+        results.put((path, None, e))
+        continue
+      if converted is None:
+        results.put((path, None, "Could not convert {}.".format(path)))
+      else:
+        ready.put((path, converted))
+
+  def close():
+    for t in converter_threads:
+      t.join()
+    for _ in range(parsers):
+      ready.put(_DONE)
+
+  def parse_forms():
+    while True:
+      item = ready.get()
+      if item is _DONE:
+        results.put(_DONE)
+        break
+      path, converted = item
+      try:
+        results.put((path, parse(path, converted), None))
+      except Exception as e:
+        results.put((path, None, e))
+
+  converter_threads = [threading.Thread(target=convert_forms, args=(os.path.join(profiles, str(i)),), daemon=True)
+                       for i in range(converters)]
+  threads = [threading.Thread(target=feed, daemon=True), *converter_threads,
+             threading.Thread(target=close, daemon=True),
+             *[threading.Thread(target=parse_forms, daemon=True) for _ in range(parsers)]]
+  for t in threads:
+    t.start()
+
+  done = 0
+  while done < parsers:
+    item = results.get()
+    if item is _DONE:
+      done += 1
+    else:
+      yield item
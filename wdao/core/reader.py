@@ -0,0 +1,60 @@
+import csv
+
+from . helpers import matches, matches_part
+
+
+class RowIndex:
+  """ Lazy access to the rows of an ordered data file (full name, part, *harvests),
+  e.g. output/geordende_oogsten_jaar.csv.
+  Only the byte offset of each plant/part is kept in memory, rows are read and
+  parsed when they are requested.
+    Arguments:
+      path (string): Path to the .csv file.
+  """
+
+  def __init__(self, path):
+    self.path = path
+    # {(full name, part): byte offset of the row}
+    self.offsets = {}
+    self._scan()
+
+  def _scan(self):
+    """ Record the offset of each row, reading only the name and part. """
+    offset = 0
+    with open(self.path, 'rb') as f:
+      for line in f:
+        if line.strip():
+          if b'"' in line:
+            name, part = self._parse(line)[:2]
+          else:
+            name, part = [v.decode() for v in line.rstrip(b'\r\n').split(b',', 2)[:2]]
+          self.offsets[(name, part)] = offset
+        offset += len(line)
+
+  @staticmethod
+  def _parse(line):
+    return next(csv.reader([line.decode()]))
+
+  def __len__(self):
+    return len(self.offsets)
+
+  def __iter__(self):
+    return self.rows()
+
+  def keys(self, plants=None, parts=None):
+    """ Return the (full name, part) of the rows that pass the filters, in file order. """
+    return [k for k in self.offsets
+            if matches(k[0], plants, prefix=True) and matches_part(k[1], parts)]
+
+  def row(self, name, part):
+    """ Return the row of a plant/part as a list of strings. """
+    with open(self.path, 'rb') as f:
+      f.seek(self.offsets[(name, part)])
+      return self._parse(f.readline())
+
+  def rows(self, plants=None, parts=None):
+    """ Yield the rows that pass the filters one by one, in file order. """
+    with open(self.path, 'rb') as f:
+      for key in self.keys(plants, parts):
+        f.seek(self.offsets[key])
+        yield self._parse(f.readline())
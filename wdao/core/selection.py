@@ -0,0 +1,94 @@
+import csv
+import os
+import re
+
+from . import helpers
+
+# Filename of a leveringsformulier: <yy><code><mm><dd>
+FILENAME = re.compile(r"""(\d\d)      # year
+                          ([A-Za-z]+) # the plant code
+                          (\d\d)      # the month
+                          (\d\d)      # the day
+                      """, re.IGNORECASE | re.VERBOSE)
+
+
+def form_selected(path, years=None, codes=None):
+  """ Return True if the year and code in the filename of a form pass the filters. """
+  y, code = FILENAME.search(os.path.split(path)[1]).groups()[:2]
+  if years is not None:
+    years = [helpers.full_year(y) for y in years]
+  return helpers.matches(helpers.full_year(y), years) and helpers.matches(code, codes)
+
+
+def harvest_selected(row, years=None, codes=None, plants=None, parts=None):
+  """ Return True if a harvest row (code, full name, part, dd-mm-yyyy, form) passes the filters.
+  Year and code are taken from the filename of the form, like the forms are selected.
+  Rows without a form, from before it was recorded, use the year of the harvest date. """
+  code, name, part, date = row[:4]
+  if not (helpers.matches(name, plants, prefix=True) and helpers.matches_part(part, parts)):
+    return False
+  if len(row) > 4 and FILENAME.search(row[4]):
+    return form_selected(row[4], years, codes)
+  if years is not None:
+    years = [helpers.full_year(y) for y in years]
+  return helpers.matches(code, codes) and helpers.matches(date.strip()[-4:], years)
+
+
+def ordered_selected(row, plants=None, parts=None):
+  """ Return True if an ordered row (full name, part, ...) passes the filters. """
+  return helpers.matches(row[0], plants, prefix=True) and helpers.matches_part(row[1], parts)
+
+
+def outside(plants=None, parts=None):
+  """ Return a function telling which rows of an existing ordered output to keep,
+  or None if the output should be overwritten. """
+  if plants is None and parts is None:
+    return None
+  return lambda row: not ordered_selected(row, plants=plants, parts=parts)
+
+
+def read_csv(path):
+  """ Return the rows of a .csv file, or [] if it does not exist. """
+  try:
+    with open(path) as f:
+      return [row for row in csv.reader(f) if row]
+  except FileNotFoundError:
+    return []
+
+
+def write_csv(path, rows, keep=None):
+  """ Write rows to a .csv file.
+  Arguments:
+    keep (callable): Merge with the existing file, keeping the rows for which keep(row) is True.
+      By default the file is overwritten.
+  """
+  kept = [row for row in read_csv(path) if keep(row)] if keep is not None else []
+  os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+  with open(path, 'w') as f:
+    wr = csv.writer(f)
+    wr.writerows(kept)
+    wr.writerows(rows)
+  return path
+
+
+def merge_harvests(path, rows, years=None, codes=None, plants=None, parts=None):
+  """ Replace the selected harvests in the file path by rows.
+  Harvests outside the selection are kept. Return all harvests. """
+  rows = [row for row in read_csv(path)
+          if not harvest_selected(row, years=years, codes=codes, plants=plants, parts=parts)] + rows
+  if rows:
+    write_csv(path, rows)
+  return rows
+
+
+def known_codes(path, plants=None, parts=None):
+  """ Return the set of all codes in the harvests in path, and the set of codes
+  of the selected plants/parts. """
+  known = set()
+  selected = set()
+  for row in read_csv(path):
+    code = row[0].strip().lower()
+    known.add(code)
+    if harvest_selected(row, plants=plants, parts=parts):
+      selected.add(code)
+  return known, selected
@@ -0,0 +1,141 @@
+import csv
+import os
+import shutil
+import threading
+import time
+
+from pathlib import Path
+
+MAX_BYTES = 1024**3 # Default size cap of the workspace
+
+
+class Workspace:
+  """ Converted copies of forms in tmp/<parentdir>/.
+  Keeps track of the source of each copy in tmp/workspace.csv, so copies are
+  converted again when the source changes, and the least recently used copies
+  can be evicted. LibreOffice profiles are kept in tmp/.profiles/.
+    Arguments:
+      root (string): Workspace directory.
+      max_bytes (int): Size cap used by prune.
+  """
+
+  def __init__(self, root='tmp', max_bytes=MAX_BYTES):
+    self.root = os.path.normpath(root)
+    self.max_bytes = max_bytes
+    self.manifest = os.path.join(self.root, 'workspace.csv')
+    self.profiles = os.path.join(self.root, '.profiles')
+    # {path: [source, source mtime, last used]}
+    self.entries = {}
+    self.lock = threading.Lock()
+    self.load()
+
+  def load(self):
+    """ Read the entries from the manifest. """
+    try:
+      with open(self.manifest) as f:
+        for path, source, mtime, used in csv.reader(f):
+          self.entries[path] = [source, float(mtime), float(used)]
+    except FileNotFoundError:
+      pass
+
+  def save(self):
+    """ Write the entries to the manifest. """
+    with self.lock:
+      os.makedirs(self.root, exist_ok=True)
+      with open(self.manifest, 'w') as f:
+        wr = csv.writer(f)
+        wr.writerows([path, *entry] for path, entry in sorted(self.entries.items()))
+
+  def path_for(self, source, extension='.docx'):
+    """ Return the path of the converted copy of source. """
+    parentdir = os.path.split(str(Path(source).parents[0]))[1]
+    short_name = os.path.splitext(os.path.split(source)[1])[0]
+    return os.path.join(self.root, parentdir, short_name + extension)
+
+  def lookup(self, source, extension='.docx'):
+    """ Return the path of an up to date copy of source, or None if it has to be converted.
+    Stale copies are left in place, see evict. """
+    path = self.path_for(source, extension)
+    mtime = os.path.getmtime(source)
+    with self.lock:
+      if not os.path.isfile(path):
+        return None
+      entry = self.entries.get(path)
+      # Copies from before the manifest are kept if they are newer than the source.
+      if entry is None and os.path.getmtime(path) >= mtime:
+        entry = self.entries[path] = [source, mtime, 0]
+      if entry is None or entry[1] != mtime:
+        return None
+      entry[2] = time.time()
+    return path
+
+  def evict(self, source, extension='.docx'):
+    """ Remove the copy of source, if any. """
+    path = self.path_for(source, extension)
+    with self.lock:
+      self.entries.pop(path, None)
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+
+  def add(self, source, path):
+    """ Register path as the converted copy of source. """
+    with self.lock:
+      self.entries[path] = [source, os.path.getmtime(source), time.time()]
+
+  def prune(self, max_bytes=None):
+    """ Remove copies of which the source has changed or is gone. Then, while the
+    files in the workspace take more than max_bytes, remove copies that are not in the
+    manifest, the LibreOffice profiles and the least recently used copies, in that order.
+    Return the removed paths. """
+    max_bytes = self.max_bytes if max_bytes is None else max_bytes
+    removed = []
+    with self.lock:
+      for path, (source, mtime, used) in list(self.entries.items()):
+        if not os.path.isfile(path):
+          del self.entries[path]
+        elif not os.path.isfile(source) or os.path.getmtime(source) != mtime:
+          os.remove(path)
+          del self.entries[path]
+          removed.append(path)
+
+      # Size of every file in the workspace, profiles are counted per profile.
+      untracked = {}
+      profiles = {}
+      total = 0
+      for directory, dirs, files in os.walk(self.root):
+        for name in files:
+          path = os.path.join(directory, name)
+          try:
+            size = os.path.getsize(path)
+          except OSError:
+            continue
+          total += size
+          if os.path.commonpath([path, self.profiles]) == self.profiles:
+            profile = os.path.join(self.profiles, os.path.relpath(path, self.profiles).split(os.sep)[0])
+            profiles[profile] = profiles.get(profile, 0) + size
+          elif path not in self.entries and path != self.manifest:
+            untracked[path] = size
+
+      candidates = sorted(untracked, key=os.path.getmtime) + sorted(profiles) + \
+                   sorted(self.entries, key=lambda p: self.entries[p][2])
+      for path in candidates:
+        if total <= max_bytes:
+          break
+        if path in profiles:
+          shutil.rmtree(path, ignore_errors=True)
+          total -= profiles[path]
+        else:
+          total -= os.path.getsize(path)
+          os.remove(path)
+          self.entries.pop(path, None)
+        removed.append(path)
+    self.save()
+    return removed
+
+  def clear(self):
+    """ Remove the whole workspace. """
+    with self.lock:
+      shutil.rmtree(self.root, ignore_errors=True)
+      self.entries = {}
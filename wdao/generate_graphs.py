@@ -1,4 +1,5 @@
 #!/user/bin/python3
+import argparse
 import matplotlib.pyplot as plt
 import numpy as np
 import pickle
@@ -9,16 +10,24 @@ from matplotlib.backends.backend_pdf import PdfPages
 # Progress bar
 from tqdm import tqdm
 
-from core.data import Data
 from core.helpers import create_incremented_filename
+from core.reader import RowIndex
+
+def parse_args():
+  parser = argparse.ArgumentParser(description='Plot the harvest dates per plant/part over the years.')
+  parser.add_argument('--plants', nargs='+', help='Only plot these plants.')
+  parser.add_argument('--parts', nargs='+', help='Only plot these plant parts.')
+  return parser.parse_args()
 
 def main():
-  d = Data()
-  d.collect_from_csv('output/geordende_oogsten_jaar.csv')
+  args = parse_args()
+  # Rows are read one at a time, only for the selected plants/parts.
+  index = RowIndex('output/geordende_oogsten_jaar.csv')
+  total = len(index.keys(args.plants, args.parts))
 
   filename = create_incremented_filename('output/graphs_multiple.pdf')
   with PdfPages(filename) as pdf:
-    for line in tqdm(d.data):
+    for line in tqdm(index.rows(args.plants, args.parts), total=total):
       name = ' '.join(line[:2])
       # Load date year pairs [decimal_date, year]
       date_year_pairs = [l.strip().split('#') for l in line[2:] if (l.strip() not in ('', '\n', '0', 0))]
@@ -48,6 +57,7 @@ def main():
       plt.xlabel('Harvests')
       plt.title(name)
       pdf.savefig()
+      plt.close()
 
 #  with PdfPages('output/graphs_combined.pdf') as pdf:
 #    plt.figure()
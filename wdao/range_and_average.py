@@ -1,9 +1,20 @@
+import argparse
+
 import core.data as data
 
+
+def parse_args():
+  parser = argparse.ArgumentParser(description='Calculate the range and average dates for each harvest.')
+  parser.add_argument('--plants', nargs='+', help='Only update these plants.')
+  parser.add_argument('--parts', nargs='+', help='Only update these plant parts.')
+  return parser.parse_args()
+
+
 def main():
+  args = parse_args()
   d = data.Data()
   d.collect_from_csv('output/geordende_oogsten_jaar.csv')
-  d.range_and_average()
+  d.range_and_average(plants=args.plants, parts=args.parts)
 
 if __name__ == '__main__':
   main()
@@ -0,0 +1,57 @@
+import random
+import statistics
+
+import numpy as np
+import pytest
+
+from core.aggregate import aggregate, group_by
+
+
+@pytest.fixture
+def groups():
+  """ Uneven groups of values in random order: {key: [(value, weight)]}. """
+  rng = random.Random(1)
+  groups = {}
+  for key, n in (('a', 1), ('b', 2), ('c', 5), ('d', 8), ('e', 13)):
+    groups[key] = [(rng.uniform(1, 12), rng.randint(1, 5)) for _ in range(n)]
+  return groups
+
+
+def flatten(groups):
+  items = [(k, v, w) for k, pairs in groups.items() for v, w in pairs]
+  random.Random(2).shuffle(items)
+  return zip(*items)
+
+
+def test_group_by_matches_reference(groups):
+  keys, values, weights = flatten(groups)
+  result = group_by(keys, values, ('median', 'mean', 'trimmed_mean', 'weighted_mean'),
+                    weights=weights, trim=0.2)
+  for key, pairs in groups.items():
+    values = sorted(v for v, w in pairs)
+    k = int(len(values) * 0.2)
+    assert result[key]['median'] == pytest.approx(statistics.median(values))
+    assert result[key]['mean'] == pytest.approx(np.mean(values))
+    assert result[key]['trimmed_mean'] == pytest.approx(np.mean(values[k:len(values)-k]))
+    assert result[key]['weighted_mean'] == pytest.approx(
+      np.average([v for v, w in pairs], weights=[w for v, w in pairs]))
+
+
+def test_weighted_median_matches_expanded_median(groups):
+  # With integer weights, the weighted median is the median of each value repeated weight times.
+  keys, values, weights = flatten(groups)
+  result = group_by(keys, values, ('weighted_median',), weights=weights)
+  for key, pairs in groups.items():
+    expanded = [v for v, w in pairs for _ in range(w)]
+    assert result[key]['weighted_median'] == pytest.approx(statistics.median(expanded))
+
+
+def test_weighted_median_equal_weights_is_median():
+  assert aggregate([4, 1, 3, 2], 'weighted_median') == 2.5
+  assert aggregate([4, 1, 3, 2], 'median') == 2.5
+  assert aggregate([5, 1, 3], 'weighted_median') == 3
+
+
+def test_unknown_statistic():
+  with pytest.raises(ValueError):
+    group_by(['a'], [1], ('mode',))
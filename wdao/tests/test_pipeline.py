@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from core.pipeline import convert_and_parse
+
+
+def test_failed_conversion_is_reported_per_form(tmp_path):
+  parsed = []
+
+  def convert(path, profile):
+    time.sleep(0.01)
+    return None if path == 'b.doc' else path + 'x'
+
+  def parse(path, converted):
+    parsed.append(path)
+    return converted
+
+  results = sorted(convert_and_parse(['a.doc', 'b.doc', 'c.doc'], convert, parse,
+                                     profiles=str(tmp_path)))
+  assert results[0] == ('a.doc', 'a.docx', None)
+  assert results[1][:2] == ('b.doc', None)
+  assert 'b.doc' in results[1][2]
+  assert results[2] == ('c.doc', 'c.docx', None)
+  # The parser never sees a form that could not be converted.
+  assert sorted(parsed) == ['a.doc', 'c.doc']
+
+
+def test_errors_do_not_stop_the_run(tmp_path):
+  def convert(path, profile):
+    if path == 'a.doc':
+      raise OSError('soffice crashed')
+    return path
+
+  def parse(path, converted):
+    if path == 'b.txt':
+      raise TypeError('File format .txt not accepted.')
+    return path
+
+  paths = ['a.doc', 'b.txt'] + ['{}.doc'.format(i) for i in range(20)]
+  results = {path: (result, error) for path, result, error in
+             convert_and_parse(paths, convert, parse, converters=3, maxsize=2, profiles=str(tmp_path))}
+  assert isinstance(results.pop('a.doc')[1], OSError)
+  assert isinstance(results.pop('b.txt')[1], TypeError)
+  assert results == {p: (p, None) for p in paths[2:]}
+
+
+def test_conversion_overlaps_parsing(tmp_path):
+  def convert(path, profile):
+    time.sleep(0.05)
+    return path
+
+  def parse(path, converted):
+    time.sleep(0.05)
+    return path
+
+  start = time.time()
+  results = list(convert_and_parse(range(10), convert, parse, converters=2, profiles=str(tmp_path)))
+  assert len(results) == 10
+  # Sequential conversion and parsing would take 1 second.
+  assert time.time() - start < 0.9
+
+
+def test_each_converter_has_its_own_profile(tmp_path):
+  # All 3 converters wait for each other on their first form, so they run at the same time.
+  barrier = threading.Barrier(3, timeout=5)
+  started = threading.local()
+  used = set()
+  lock = threading.Lock()
+
+  def convert(path, profile):
+    if not getattr(started, 'value', False):
+      started.value = True
+      barrier.wait()
+    with lock:
+      used.add((threading.get_ident(), profile))
+    return path
+
+  results = list(convert_and_parse(range(20), convert, lambda p, c: p, converters=3, profiles=str(tmp_path)))
+  assert all(error is None for path, result, error in results)
+  threads = {thread for thread, profile in used}
+  profiles = {profile for thread, profile in used}
+  # Each converter thread uses one profile of its own.
+  assert len(threads) == len(profiles) == len(used) == 3
+  assert profiles == {str(tmp_path / str(i)) for i in range(3)}
+
+
+def test_at_least_one_converter():
+  with pytest.raises(ValueError):
+    convert_and_parse(['a.doc'], lambda p, profile: p, lambda p, c: p, converters=0)
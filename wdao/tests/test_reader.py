@@ -0,0 +1,45 @@
+import csv
+
+import pytest
+
+from core.reader import RowIndex
+
+ROWS = [
+  ['Arnica montana', 'bloem', '6.57#2012', '7.01#2013'],
+  ['Calendula officinalis', 'bloem, blad', '7.10#2012', ''],
+  ['Arnica montana', 'wortel', '9.10#2012'],
+  ['Achillea millefolium', 'kruid'],
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+  path = str(tmp_path / 'geordende_oogsten_jaar.csv')
+  # Written like Data.save_data_to_csv, quoting the part with a comma.
+  with open(path, 'w') as f:
+    csv.writer(f).writerows(ROWS)
+  return RowIndex(path)
+
+
+def test_offsets(index):
+  with open(index.path, 'rb') as f:
+    lines = f.readlines()
+  assert b'"bloem, blad"' in lines[1]
+  starts = [sum(len(l) for l in lines[:i]) for i in range(len(lines))]
+  assert list(index.offsets.items()) == [(tuple(row[:2]), start) for row, start in zip(ROWS, starts)]
+  assert len(index) == 4
+
+
+def test_row(index):
+  assert index.row('Calendula officinalis', 'bloem, blad') == ROWS[1]
+  assert index.row('Achillea millefolium', 'kruid') == ROWS[3]
+  with pytest.raises(KeyError):
+    index.row('Arnica montana', 'blad')
+
+
+def test_rows_in_file_order(index):
+  assert list(index) == ROWS
+  assert list(index.rows(plants=['arnica'])) == [ROWS[0], ROWS[2]]
+  # Parts are compared on their first 4 letters.
+  assert list(index.rows(parts=['bloemen'])) == [ROWS[0], ROWS[1]]
+  assert index.keys(plants=['arnica'], parts=['wortel']) == [('Arnica montana', 'wortel')]
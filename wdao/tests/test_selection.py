@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from core import selection
+
+
+@pytest.fixture
+def data_csv(tmp_path):
+  path = str(tmp_path / 'output' / 'data.csv')
+  selection.write_csv(path, [
+    ['arn', 'Arnica montana', 'bloem', '12-06-2016', '16arn0612.doc'],
+    ['arn', 'Arnica montana', 'bloem', '00-00-0000', '16arn0701.doc'],
+    ['arn', 'Arnica montana', 'bloem', '20-06-2015', '15arn0620.doc'],
+    ['cal', 'Calendula officinalis', 'bloemen, blad', '02-07-2016', '16cal0702.doc'],
+  ])
+  return path
+
+
+def test_refresh_with_invalid_date_replaces_the_row(data_csv):
+  # The forms of 2016 are parsed again, one date still cannot be read.
+  new = [['arn', 'Arnica montana', 'bloem', '13-06-2016', '16arn0612.doc'],
+         ['arn', 'Arnica montana', 'bloem', '00-00-0000', '16arn0701.doc']]
+  for _ in range(2):
+    selection.merge_harvests(data_csv, [list(r) for r in new], years=[2016], codes=['arn'])
+  rows = selection.read_csv(data_csv)
+  assert sorted(rows) == sorted([
+    ['arn', 'Arnica montana', 'bloem', '20-06-2015', '15arn0620.doc'],
+    ['cal', 'Calendula officinalis', 'bloemen, blad', '02-07-2016', '16cal0702.doc'],
+    *new,
+  ])
+
+
+def test_merge_keeps_rows_outside_the_selection(data_csv):
+  before = selection.read_csv(data_csv)
+  new = [['cal', 'Calendula officinalis', 'bloemen, blad', '03-07-2016', '16cal0702.doc']]
+  rows = selection.merge_harvests(data_csv, new, plants=['calendula'])
+  assert rows == selection.read_csv(data_csv)
+  assert rows == before[:3] + new
+
+
+def test_merge_without_form_uses_the_date(tmp_path):
+  # Rows written before the form was recorded.
+  path = str(tmp_path / 'data.csv')
+  selection.write_csv(path, [['arn', 'Arnica montana', 'bloem', '12-06-2016'],
+                             ['arn', 'Arnica montana', 'bloem', '12-06-2015']])
+  new = [['arn', 'Arnica montana', 'bloem', '13-06-2016', '16arn0612.doc']]
+  assert selection.merge_harvests(path, new, years=[16]) == \
+    [['arn', 'Arnica montana', 'bloem', '12-06-2015']] + new
+
+
+def test_empty_selection_keeps_file(data_csv):
+  before = selection.read_csv(data_csv)
+  assert selection.merge_harvests(data_csv, [], codes=['xyz']) == before
+  assert selection.merge_harvests(data_csv + '.missing', [], codes=['xyz']) == []
+  assert not os.path.exists(data_csv + '.missing')
+
+
+def test_ordered_output_merge(tmp_path):
+  path = str(tmp_path / 'geordende_oogsten_jaar.csv')
+  selection.write_csv(path, [['Arnica montana', 'bloem', '6.40#2015'],
+                             ['Calendula officinalis', 'bloemen', '7.10#2015']])
+  selection.write_csv(path, [['Calendula officinalis', 'bloemen', '7.20#2015']],
+                      keep=selection.outside(parts=['bloem']))
+  # 'bloem' selects both parts, like the specs are matched.
+  assert selection.read_csv(path) == [['Calendula officinalis', 'bloemen', '7.20#2015']]
+  selection.write_csv(path, [['Arnica montana', 'bloem', '6.50#2015']],
+                      keep=selection.outside(plants=['arnica']))
+  assert selection.read_csv(path) == [['Calendula officinalis', 'bloemen', '7.20#2015'],
+                                      ['Arnica montana', 'bloem', '6.50#2015']]
+
+
+def test_spc_report_merge(tmp_path):
+  path = str(tmp_path / 'SPEC_bestanden_veranderingen.csv')
+  selection.write_csv(path, [['SPC1.doc', 'Arnica montana', 'bloem', 'juni', 'juli', '3'],
+                             ['SPC2.doc', 'Calendula officinalis', 'blad', 'mei', 'juni', '2']])
+  selection.write_csv(path, [['SPC2.doc', 'Calendula officinalis', 'blad', 'mei', 'eind mei', '3']],
+                      keep=lambda row: row[0] not in ['SPC2.doc'])
+  assert [row[4] for row in selection.read_csv(path)] == ['juli', 'eind mei']
+
+
+def test_known_codes(data_csv):
+  assert selection.known_codes(data_csv, plants=['arnica']) == ({'arn', 'cal'}, {'arn'})
+  assert selection.known_codes(data_csv, parts=['blad']) == ({'arn', 'cal'}, {'cal'})
+  assert selection.known_codes(data_csv + '.missing', plants=['arnica']) == (set(), set())
+
+
+def test_form_selected():
+  assert selection.form_selected('../2016/16ARN0612.doc', years=[2016], codes=['arn'])
+  assert not selection.form_selected('../2016/16arn0612.doc', years=[2015])
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from core.workspace import Workspace
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+  monkeypatch.chdir(tmp_path)
+  os.mkdir('2012')
+  for name in ('a', 'b', 'c'):
+    with open(os.path.join('2012', name + '.doc'), 'w') as f:
+      f.write('form')
+  return Workspace()
+
+
+def convert(workspace, source, size=100):
+  path = workspace.path_for(source)
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, 'w') as f:
+    f.write('x' * size)
+  workspace.add(source, path)
+  return path
+
+
+def test_lookup_does_not_remove_stale_copies(workspace):
+  path = convert(workspace, '2012/a.doc')
+  assert workspace.lookup('2012/a.doc') == path
+  os.utime('2012/a.doc', (1, 1))
+  assert workspace.lookup('2012/a.doc') is None
+  assert os.path.isfile(path)
+  workspace.evict('2012/a.doc')
+  assert not os.path.isfile(path)
+
+
+def test_prune_removes_stale_copies(workspace):
+  a = convert(workspace, '2012/a.doc')
+  b = convert(workspace, '2012/b.doc')
+  os.utime('2012/a.doc', (1, 1))
+  assert workspace.prune() == [a]
+  assert os.path.isfile(b)
+  assert list(Workspace().entries) == [b]
+
+
+def test_prune_counts_profiles_and_untracked_files(workspace):
+  a = convert(workspace, '2012/a.doc')
+  b = convert(workspace, '2012/b.doc')
+  workspace.lookup('2012/a.doc') # a is used more recently than b
+  untracked = os.path.join('tmp', '2011', 'old.docx')
+  os.makedirs(os.path.dirname(untracked))
+  with open(untracked, 'w') as f:
+    f.write('x' * 100)
+  profile = os.path.join(workspace.profiles, '0')
+  os.makedirs(os.path.join(profile, 'user'))
+  with open(os.path.join(profile, 'user', 'registrymodifications.xcu'), 'w') as f:
+    f.write('x' * 100)
+
+  # 400 bytes: evict the untracked copy, the profile, then the least recently used b.
+  assert workspace.prune(150) == [untracked, profile, b]
+  assert os.path.isfile(a)
+  assert not os.path.exists(profile)
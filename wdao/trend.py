@@ -0,0 +1,23 @@
+#!/usr/bin/python3
+import argparse
+
+import core.data as data
+from core.reader import RowIndex
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(description='Calculate the trend of the harvest dates per plant/part.')
+  parser.add_argument('--plants', nargs='+', help='Only update these plants.')
+  parser.add_argument('--parts', nargs='+', help='Only update these plant parts.')
+  return parser.parse_args()
+
+
+def main():
+  args = parse_args()
+  # Rows are read one at a time, only for the selected plants/parts.
+  index = RowIndex('output/geordende_oogsten_jaar.csv')
+  d = data.Data()
+  d.trend(rows=index.rows(args.plants, args.parts), plants=args.plants, parts=args.parts)
+
+if __name__ == '__main__':
+  main()
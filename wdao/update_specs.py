@@ -1,40 +1,108 @@
 #!/usr/bin/python3
+import argparse
+import csv
 import glob
+import os
 from tqdm import tqdm
 
 import core.data
 import core.forms as forms
+from core.helpers import matches, matches_part
 
 MIN_N_DATA = None # Minimal number of harvests required to base new range on
+INDEX = 'output/SPC_index.csv' # Plant name and part per SPC file, from earlier runs
+OUTPUT = 'output/SPEC_bestanden_veranderingen.csv'
 
-# Get spec files
-spec_files = glob.glob('../SPC/SPC*')
-spec_files += glob.glob('../SPC/spc*')
 
-# Update files
-data = []
-for f in tqdm(spec_files):
-  s = forms.Spec(f)
-  line = s.update(data='output/geordende_oogsten_bereik_gem.csv', min_n=MIN_N_DATA)
-  if line: data.append(line)
+def parse_args():
+  parser = argparse.ArgumentParser(description='Update the SPC files based on the range and average dates.')
+  parser.add_argument('--plants', nargs='+', help='Only update the specs of these plants.')
+  parser.add_argument('--parts', nargs='+', help='Only update the specs of these plant parts.')
+  return parser.parse_args()
 
-# Save rapport
-d = core.data.Data()
-d.data = data
-output = 'output/SPEC_bestanden_veranderingen.csv'
-d.save_data_to_csv(output)
 
-print('Finished. Changed {} of {} files.'.format(len(spec_files)-len(forms.Spec.not_found), len(spec_files)))
+def load_index(path=INDEX):
+  """ Return {spec file: (mtime, plant name, plant part)} from earlier runs. """
+  index = {}
+  try:
+    with open(path) as f:
+      for f_path, mtime, name, part in csv.reader(f):
+        index[f_path] = (float(mtime), name, part)
+  except FileNotFoundError:
+    pass
+  return index
 
-if forms.Spec.not_found:
-  print('For {} files, no valid data was found. {:.2f}%'.format(len(forms.Spec.not_found), len(forms.Spec.not_found)/len(spec_files) * 100))
-  print('These files are')
-  [print(f) for f in forms.Spec.not_found]
 
-if forms.Spec.not_enough_data:
-  print('For {} files, not enough data was available to base a new period on. {:.2f}%'.format(len(forms.Spec.not_enough_data), len(forms.Spec.not_enough_data)/len(spec_files) *100))
-  print('These files are')
-  [print(f) for f in forms.Spec.not_enough_data]
+def save_index(index, path=INDEX):
+  with open(path, 'w') as f:
+    wr = csv.writer(f)
+    wr.writerows([f_path, *v] for f_path, v in sorted(index.items()))
 
 
-print("Rapport saved to {}".format(output))
+def is_selected(f, index, plants=None, parts=None):
+  """ Return False only if the index shows that spec file f is outside the selection.
+  Unknown or changed files have to be opened to find out. """
+  if plants is None and parts is None:
+    return True
+  try:
+    mtime, name, part = index[f]
+  except KeyError:
+    return True
+  if mtime != os.path.getmtime(f):
+    return True
+  return matches(name, plants, prefix=True) and matches_part(part, parts)
+
+
+def main():
+  args = parse_args()
+
+  # Get spec files
+  spec_files = glob.glob('../SPC/SPC*')
+  spec_files += glob.glob('../SPC/spc*')
+
+  # Skip the specs known to be outside the selection, without opening them.
+  index = load_index()
+  selected = [f for f in spec_files if is_selected(f, index, args.plants, args.parts)]
+
+  # Update files
+  data = []
+  for f in tqdm(selected):
+    s = forms.Spec(f)
+    line = s.update(data='output/geordende_oogsten_bereik_gem.csv', min_n=MIN_N_DATA,
+                    plants=args.plants, parts=args.parts)
+    if line: data.append(line)
+    if s.plant_name and s.plant_part:
+      index[f] = (os.path.getmtime(f), s.plant_name.strip(), s.plant_part.strip())
+  save_index(index)
+  forms.workspace.prune()
+
+  # Save rapport
+  # Only the rows of the processed specs are replaced when a selection is made.
+  d = core.data.Data()
+  d.data = data
+  keep = None
+  if args.plants is not None or args.parts is not None:
+    processed = [os.path.split(f)[1] for f in selected]
+    keep = lambda row: row[0] not in processed
+  d.save_data_to_csv(OUTPUT, keep=keep)
+
+  skipped = len(spec_files) - len(selected) + len(forms.Spec.skipped)
+  print('Finished. Changed {} of {} files.'.format(len(data), len(spec_files)))
+  if skipped:
+    print('{} files are outside the selection.'.format(skipped))
+
+  if forms.Spec.not_found:
+    print('For {} files, no valid data was found. {:.2f}%'.format(len(forms.Spec.not_found), len(forms.Spec.not_found)/len(spec_files) * 100))
+    print('These files are')
+    [print(f) for f in forms.Spec.not_found]
+
+  if forms.Spec.not_enough_data:
+    print('For {} files, not enough data was available to base a new period on. {:.2f}%'.format(len(forms.Spec.not_enough_data), len(forms.Spec.not_enough_data)/len(spec_files) *100))
+    print('These files are')
+    [print(f) for f in forms.Spec.not_enough_data]
+
+
+  print("Rapport saved to {}".format(OUTPUT))
+
+if __name__ == '__main__':
+  main()